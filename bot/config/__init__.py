@@ -1 +1 @@
-from .config import settings
+from .config import settings, reload_settings, RESTART_REQUIRED
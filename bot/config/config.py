@@ -1,3 +1,6 @@
+from typing import Literal
+
+from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -16,5 +19,54 @@ class Settings(BaseSettings):
 
     USE_PROXY_FROM_FILE: bool = False
 
+    # session that handles the Telegram commands, by default - the first one
+    COMMAND_SESSION: str = ''
+
+    # file - one sessions/*.session file per session, db - all sessions in sessions/sessions.db
+    SESSION_STORAGE: Literal['file', 'db'] = 'file'
+
+    # how often .env and proxies.txt are checked for changes, 0 - disabled
+    CONFIG_RELOAD_INTERVAL: int = 10
+
+    ENABLE_PROFILING: bool = False
+    # event loop lag (seconds) after which a warning with the blocking stack is logged
+    LOOP_LAG_THRESHOLD: float = 0.1
+    PROFILE_DURATION: int = 30
+    USE_UVLOOP: bool = False
+
+    # how long (seconds) a turbo charge lasts, the game does not report it - 20 is what the soak stand-in assumes
+    TURBO_DURATION: int = 20
+
+    # history of balances, claims and boosts in ledger/
+    USE_LEDGER: bool = True
+
+    # every request and response with the tokens redacted in traffic/, for python -m bot.soak.replay
+    RECORD_TRAFFIC: bool = False
+
+    @field_validator('RANDOM_TAPS_COUNT', 'SLEEP_BETWEEN_TAP')
+    @classmethod
+    def check_range(cls, value: list[int]) -> list[int]:
+        if len(value) != 2 or value[0] > value[1]:
+            raise ValueError("must be a [min, max] pair")
+
+        return value
+
+
+# these are only read when the clients are created, changing them requires a restart
+RESTART_REQUIRED = ('API_ID', 'API_HASH', 'SESSION_STORAGE', 'USE_UVLOOP', 'COMMAND_SESSION')
+
 
 settings = Settings()
+
+
+def reload_settings() -> list[str]:
+    new_settings = Settings()
+
+    changed = [name for name in Settings.model_fields
+               if getattr(new_settings, name) != getattr(settings, name)]
+
+    for name in changed:
+        if name not in RESTART_REQUIRED:
+            setattr(settings, name, getattr(new_settings, name))
+
+    return changed
@@ -0,0 +1,107 @@
+from time import time
+from enum import IntEnum
+
+from bot.config import settings
+
+
+# when the server gives no deadline, the status is checked again after this many seconds
+STATUS_FALLBACK_INTERVAL = 7200
+
+
+class Boost(IntEnum):
+    # positions in the `data` list of user-boosts-status
+    TURBO = 0
+    ENERGY = 1
+
+
+class BoostState:
+    __slots__ = ("charges_left", "next_available_at", "refresh_at", "granted", "applied")
+
+    def __init__(self):
+        self.charges_left = 0
+        self.next_available_at: float | None = None
+        self.refresh_at = 0.0
+        self.granted = 0
+        self.applied = 0
+
+
+class BoostScheduler:
+    """Plans boosts from the `next_available_at` deadlines returned by user-boosts-status.
+
+    The status is only requested again when a charge was used up or a deadline has passed,
+    and every charge the server grants is counted so the utilization of the boosts can be reported.
+    """
+
+    def __init__(self):
+        self.boosts = {boost: BoostState() for boost in Boost}
+        self.turbo_until = 0.0
+
+    def update(self, data: list[dict]) -> None:
+        now = time()
+
+        for boost, state in self.boosts.items():
+            status = data[boost]
+            charges_left = status['charges_left']
+
+            if charges_left > state.charges_left:
+                state.granted += charges_left - state.charges_left
+
+            state.charges_left = charges_left
+            state.next_available_at = status['next_available_at']
+
+            if charges_left > 0:
+                state.refresh_at = float('inf')
+            elif state.next_available_at is not None:
+                state.refresh_at = state.next_available_at
+            else:
+                state.refresh_at = now + STATUS_FALLBACK_INTERVAL
+
+    @property
+    def granted(self) -> int:
+        return sum(state.granted for state in self.boosts.values())
+
+    def needs_status(self) -> bool:
+        return time() >= min(state.refresh_at for state in self.boosts.values())
+
+    def charges_left(self, boost: Boost) -> int:
+        return self.boosts[boost].charges_left
+
+    def turbo_active(self) -> bool:
+        return time() < self.turbo_until
+
+    def take(self, boost: Boost) -> None:
+        state = self.boosts[boost]
+        state.charges_left -= 1
+        state.applied += 1
+
+        if boost == Boost.TURBO:
+            self.turbo_until = time() + settings.TURBO_DURATION
+
+        # the deadline of the next charge is only known after the last one is used
+        if state.charges_left == 0:
+            state.next_available_at = None
+            state.refresh_at = time()
+
+    def fail(self, boost: Boost) -> None:
+        """A boost that could not be applied is not retried until the status says it is available again."""
+        state = self.boosts[boost]
+        state.charges_left = 0
+        state.next_available_at = None
+        state.refresh_at = time()
+
+    def seconds_until(self, boost: Boost) -> float:
+        state = self.boosts[boost]
+
+        if state.charges_left > 0:
+            return 0
+
+        # unknown until the status is requested again
+        if state.next_available_at is None:
+            return float('inf')
+
+        return max(state.next_available_at - time(), 0)
+
+    def utilization(self, boost: Boost) -> float:
+        state = self.boosts[boost]
+
+        return state.applied / state.granted if state.granted else 0
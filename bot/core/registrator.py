@@ -2,6 +2,7 @@ from pyrogram import Client
 
 from bot.config import settings
 from bot.utils import logger
+from bot.utils.storage import session_storage
 
 
 async def register_sessions() -> None:
@@ -20,10 +21,14 @@ async def register_sessions() -> None:
         name=session_name,
         api_id=API_ID,
         api_hash=API_HASH,
-        workdir="sessions/"
+        workdir="sessions/",
+        in_memory=settings.SESSION_STORAGE == 'db',
     )
 
     async with session:
         user_data = await session.get_me()
 
+        if settings.SESSION_STORAGE == 'db':
+            session_storage.save(name=session_name, session_string=await session.export_session_string())
+
     logger.success(f'Session added successfully @{user_data.username} | {user_data.first_name} {user_data.last_name}')
@@ -12,8 +12,13 @@ from pyrogram.raw.functions.messages import RequestWebView
 
 from bot.config import settings
 from bot.utils import logger
+from bot.utils.profiler import timed
+from bot.utils.ledger import ledger, LedgerKind
+from bot.utils.stats import fleet_stats
 from bot.exceptions import InvalidSession
 from .headers import headers
+from .boosts import Boost, BoostScheduler
+from .traffic import RecordingSession
 
 yellow = "\x1b[33;20m"
 green = "\x1b[1;32m"
@@ -22,10 +27,38 @@ reset = "\x1b[0m"
 
 
 class Tapper:
+    api_url = 'https://api-game.whitechain.io/api'
+
     def __init__(self, tg_client: Client):
         self.session_name = tg_client.name
         self.tg_client = tg_client
 
+    async def on_request_start(self, *_) -> None:
+        self.requests += 1
+        fleet_stats.add_request(self.stats)
+
+    async def on_request_end(self, _, __, params: aiohttp.TraceRequestEndParams) -> None:
+        if params.response.status >= 400:
+            fleet_stats.add_error(self.stats)
+
+    async def on_request_exception(self, *_) -> None:
+        fleet_stats.add_error(self.stats)
+
+    def create_http_client(self, proxy: str | None, trace_configs: list[aiohttp.TraceConfig]):
+        proxy_conn = ProxyConnector().from_url(proxy) if proxy else None
+        http_client = aiohttp.ClientSession(headers=headers, connector=proxy_conn, trace_configs=trace_configs)
+
+        if settings.RECORD_TRAFFIC:
+            return RecordingSession(http_client=http_client, session_name=self.session_name, api_url=self.api_url)
+
+        return http_client
+
+    def record(self, kind: LedgerKind, balance: int | None = None) -> None:
+        ledger.record(self.session_name, self.proxy, kind, balance=balance,
+                      requests=self.requests - self.recorded_requests)
+        self.recorded_requests = self.requests
+
+    @timed
     async def get_tg_web_data(self, proxy: str | None) -> str:
         if proxy:
             proxy = Proxy.from_str(proxy)
@@ -76,9 +109,10 @@ class Tapper:
             logger.error(f"{self.session_name} | Unknown error during Authorization: {error}")
             await asyncio.sleep(delay=3)
 
+    @timed
     async def login(self, http_client: aiohttp.ClientSession, tg_web_data: str) -> tuple[str, str]:
         try:
-            response = await http_client.post(url='https://api-game.whitechain.io/api/login',
+            response = await http_client.post(url=f'{self.api_url}/login',
                                               json={"init_data": tg_web_data})
             response.raise_for_status()
             response_json = await response.json()
@@ -98,15 +132,18 @@ class Tapper:
             http_client.headers["Authorization"] = f"Bearer {token}"
             headers["Authorization"] = f"Bearer {token}"
 
+            self.record(kind=LedgerKind.LOGIN, balance=balance)
+
             return refresh_token, refresh_token_expires_at
         except Exception as error:
             logger.error(f"{self.session_name} | Unknown error while getting Access Token: {error}")
             await asyncio.sleep(delay=3)
 
+    @timed
     async def get_user(self, http_client: aiohttp.ClientSession):
         try:
             response = await http_client.get(
-                url='https://api-game.whitechain.io/api/user')
+                url=f'{self.api_url}/user')
             response.raise_for_status()
             response_json = await response.json()
 
@@ -116,9 +153,10 @@ class Tapper:
             logger.error(f"{self.session_name} | Unknown error while getting user info: {error}")
             await asyncio.sleep(delay=3)
 
+    @timed
     async def send_taps(self, http_client: aiohttp.ClientSession, points: int):
         try:
-            response = await http_client.post(url='https://api-game.whitechain.io/api/claim-points',
+            response = await http_client.post(url=f'{self.api_url}/claim-points',
                                               json={'points': points})
             response.raise_for_status()
             response_json = await response.json()
@@ -129,24 +167,35 @@ class Tapper:
                            f"| Successful tapped "
                            f"| Balance: {blue}{balance}{reset} ({green}+{points}{reset}) "
                            f"| Energy: {blue}{current_energy}{reset}")
+
+            self.record(kind=LedgerKind.CLAIM, balance=balance)
+            fleet_stats.add_claim(self.stats, points=points)
+
+            return response_json['user']
         except Exception as error:
             logger.error(f"{self.session_name} | Unknown error while claim points: {error}")
             await asyncio.sleep(delay=3)
 
+    @timed
     async def apply_turbo(self, http_client: aiohttp.ClientSession):
         try:
             response = await http_client.post(
-                url='https://api-game.whitechain.io/api/apply-boost/fc5e40ed-c40b-4cfa-9a1a-9a16a5572d84')
+                url=f'{self.api_url}/apply-boost/fc5e40ed-c40b-4cfa-9a1a-9a16a5572d84')
             response.raise_for_status()
 
+            self.record(kind=LedgerKind.TURBO)
+
+            return True
+
         except Exception as error:
             logger.error(f"{self.session_name} | Unknown error while apply turbo: {error}")
             await asyncio.sleep(delay=3)
 
+    @timed
     async def level_up_reactor(self, http_client: aiohttp.ClientSession):
         try:
             response = await http_client.post(
-                url='https://api-game.whitechain.io/api/upgrade-ship/b389de1f-a262-4625-be63-ee2d7f0c3345')
+                url=f'{self.api_url}/upgrade-ship/b389de1f-a262-4625-be63-ee2d7f0c3345')
             response.raise_for_status()
 
             logger.success(f"{self.session_name} | Successful level up reactor")
@@ -154,21 +203,27 @@ class Tapper:
             logger.error(f"{self.session_name} | Unknown error while level up reactor: {error}")
             await asyncio.sleep(delay=3)
 
+    @timed
     async def recovery_energy(self, http_client: aiohttp.ClientSession):
         try:
             response = await http_client.post(
-                url='https://api-game.whitechain.io/api/apply-boost/d212b229-3fb7-4900-a275-5ae0417e0164')
+                url=f'{self.api_url}/apply-boost/d212b229-3fb7-4900-a275-5ae0417e0164')
             response.raise_for_status()
 
             logger.success(f"{self.session_name} | Successful apply {green}recovery energy{reset}")
+
+            self.record(kind=LedgerKind.ENERGY)
+
+            return True
         except Exception as error:
             logger.error(f"{self.session_name} | Unknown error while recovery energy: {error}")
             await asyncio.sleep(delay=3)
 
+    @timed
     async def refresh_token(self, http_client: aiohttp.ClientSession, token: str):
         try:
             response = await http_client.post(
-                url='https://api-game.whitechain.io/api/refresh-token', json={'refresh_token': token})
+                url=f'{self.api_url}/refresh-token', json={'refresh_token': token})
             response.raise_for_status()
             response_json = await response.json()
             token = response_json['token']
@@ -179,61 +234,30 @@ class Tapper:
             logger.error(f"{self.session_name} | Unknown error while refreshing token: {error}")
             await asyncio.sleep(delay=3)
 
-    async def get_turbo_status(self, http_client: aiohttp.ClientSession):
+    @timed
+    async def get_boosts_status(self, http_client: aiohttp.ClientSession):
         try:
-            response = await http_client.get(
-                url='https://api-game.whitechain.io/api/user-boosts-status')
+            response = await http_client.get(url=f'{self.api_url}/user-boosts-status')
             response.raise_for_status()
 
             response_json = await response.json()
-            turbo = response_json['data'][0]
-            has_turbo_boost = turbo['charges_left'] > 0
-            turbo_charges_left = turbo['charges_left']
-            turbo_next_available_at = turbo['next_available_at'] if turbo['next_available_at'] is not None else time() + 7200
-
-            if has_turbo_boost:
-                logger.success(f"{self.session_name} "
-                               f"| Has {green}{turbo['charges_left']}{reset} available {green}turbo{reset}")
-            else:
-                logger.warning(
-                    f"{self.session_name} "
-                    f"| {yellow}No turbo{reset} boosts available. "
-                    f"| Left {yellow}{round((turbo_next_available_at - time()) / 60)} min{reset}.")
-
-            return has_turbo_boost, turbo_charges_left, turbo_next_available_at
+            turbo = response_json['data'][Boost.TURBO]
+            energy = response_json['data'][Boost.ENERGY]
 
-        except Exception as error:
-            logger.error(f"{self.session_name} | Unknown error while getting boosts status: {error}")
-            await asyncio.sleep(delay=3)
+            logger.info(f"{self.session_name} "
+                        f"| Boosts: {green}{turbo['charges_left']}{reset} turbo "
+                        f"| {green}{energy['charges_left']}{reset} energy")
 
-    async def get_energy_status(self, http_client: aiohttp.ClientSession):
-        try:
-            response = await http_client.get(url='https://api-game.whitechain.io/api/user-boosts-status')
-            response.raise_for_status()
-
-            response_json = await response.json()
-            energy = response_json['data'][1]
-            has_energy_boost = energy['charges_left'] > 0
-            energy_next_available_at = (
-                energy['next_available_at'] if energy['next_available_at'] is not None else time() + 7200)
-
-            if has_energy_boost:
-                logger.success(f"{self.session_name} "
-                               f"| Has {green}{energy['charges_left']}{reset} available {green}energy{reset} boosts")
-            else:
-                logger.warning(f"{self.session_name} "
-                               f"| {yellow}No energy{reset} boosts available. "
-                               f"| Left {yellow}{round((energy_next_available_at - time()) / 60)} min{reset}.")
-
-            return has_energy_boost, energy_next_available_at
+            return response_json['data']
 
         except Exception as error:
             logger.error(f"{self.session_name} | Unknown error while getting boosts status: {error}")
             await asyncio.sleep(delay=3)
 
+    @timed
     async def update_current_energy(self, http_client: aiohttp.ClientSession):
         try:
-            response = await http_client.post(url='https://api-game.whitechain.io/api/update-current-energy')
+            response = await http_client.post(url=f'{self.api_url}/update-current-energy')
             response.raise_for_status()
             response_json = await response.json()
             return response_json['user']
@@ -241,9 +265,10 @@ class Tapper:
             logger.error(f"{self.session_name} | Unknown error while update current energy: {error}")
             await asyncio.sleep(delay=3)
 
+    @timed
     async def get_ship_improvements(self, http_client: aiohttp.ClientSession):
         try:
-            response = await http_client.get(url='https://api-game.whitechain.io/api/user-current-improvements')
+            response = await http_client.get(url=f'{self.api_url}/user-current-improvements')
             response.raise_for_status()
             response_json = await response.json()
 
@@ -253,6 +278,7 @@ class Tapper:
             logger.error(f"{self.session_name} | Unknown error while getting ship improvements: {error}")
             await asyncio.sleep(delay=3)
 
+    @timed
     async def check_proxy(self, http_client: aiohttp.ClientSession, proxy: Proxy) -> None:
         try:
             response = await http_client.get(url='https://httpbin.org/ip', timeout=aiohttp.ClientTimeout(5))
@@ -265,17 +291,30 @@ class Tapper:
         refresh_token = ''
         token_expired_time = 0
         refresh_token_time = 0
-        revalidate_turbo_time = 0
         revalidate_ship_improvements_time = 0
-        revalidate_energy_boost_time = 0
-        proxy_conn = ProxyConnector().from_url(proxy) if proxy else None
+        boosts = BoostScheduler()
+
+        self.proxy = proxy
+        self.requests = 0
+        self.recorded_requests = 0
+        self.stats = fleet_stats.get(self.session_name)
 
-        async with aiohttp.ClientSession(headers=headers, connector=proxy_conn) as http_client:
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self.on_request_start)
+        trace_config.on_request_end.append(self.on_request_end)
+        trace_config.on_request_exception.append(self.on_request_exception)
+
+        async with self.create_http_client(proxy=proxy, trace_configs=[trace_config]) as http_client:
             if proxy:
                 await self.check_proxy(http_client=http_client, proxy=proxy)
                 await asyncio.sleep(delay=1)
 
             while True:
+                if not self.stats.resumed.is_set():
+                    logger.info(f"{self.session_name} | Paused")
+                    await self.stats.resumed.wait()
+                    logger.info(f"{self.session_name} | Resumed")
+
                 try:
                     if time() >= token_expired_time - 300:
                         tg_web_data = await self.get_tg_web_data(proxy=proxy)
@@ -302,15 +341,59 @@ class Tapper:
                             await self.refresh_token(http_client=http_client, token=refresh_token)
 
                         sleep_between_clicks = randint(a=settings.SLEEP_BETWEEN_TAP[0], b=settings.SLEEP_BETWEEN_TAP[1])
+
+                        # a failed status request is retried on the next iteration and does not hold the taps back
+                        if boosts.needs_status():
+                            status = await self.get_boosts_status(http_client=http_client)
+
+                            if status:
+                                granted = boosts.granted
+                                boosts.update(data=status)
+                                fleet_stats.add_boosts_granted(self.stats, charges=boosts.granted - granted)
+
                         data = await self.update_current_energy(http_client=http_client)
                         current_energy = data['current_energy']
 
-                        if current_energy > settings.MIN_AVAILABLE_ENERGY:
+                        # energy goes first, so a turbo window that follows it has a full tank to claim
+                        if current_energy < settings.MIN_AVAILABLE_ENERGY and boosts.charges_left(Boost.ENERGY):
+                            if await self.recovery_energy(http_client=http_client):
+                                boosts.take(Boost.ENERGY)
+                                fleet_stats.add_boost_applied(self.stats)
+                                logger.info(f"{self.session_name} "
+                                            f"| Energy boost utilization: {boosts.utilization(Boost.ENERGY):.0%}")
+
+                                data = await self.update_current_energy(http_client=http_client)
+                                if data:
+                                    current_energy = data['current_energy']
+                            else:
+                                boosts.fail(Boost.ENERGY)
+
+                        # one charge per turbo window, another one inside it would only restart the window
+                        if (current_energy > settings.MIN_AVAILABLE_ENERGY and boosts.charges_left(Boost.TURBO)
+                                and not boosts.turbo_active()):
+                            if await self.apply_turbo(http_client=http_client):
+                                boosts.take(Boost.TURBO)
+                                fleet_stats.add_boost_applied(self.stats)
+                                logger.success(f"{self.session_name} "
+                                               f"| Successful apply {green}turbo{reset} "
+                                               f"| Utilization: {boosts.utilization(Boost.TURBO):.0%}")
+                            else:
+                                boosts.fail(Boost.TURBO)
+
+                        # inside a turbo window the claims are repeated while it lasts, each within RANDOM_TAPS_COUNT
+                        while current_energy > settings.MIN_AVAILABLE_ENERGY:
                             min_value, max_value = settings.RANDOM_TAPS_COUNT
                             points = randint(a=min_value, b=max_value)
-                            await self.send_taps(http_client=http_client, points=points)
+
+                            data = await self.send_taps(http_client=http_client, points=points)
+                            if not data:
+                                break
+
+                            current_energy = data['current_energy']
+                            if not boosts.turbo_active():
+                                break
+
                             await asyncio.sleep(delay=1)
-                            await self.update_current_energy(http_client=http_client)
                     except Exception as error:
                         logger.error(f"{self.session_name} | Unknown error {error}")
                         continue
@@ -328,56 +411,16 @@ class Tapper:
                     #                     f"| Set {yellow}revalidate ship improvements{reset} time to "
                     #                     f"{yellow}{round((time() + 60) / 60)} min{yellow}.")
 
-                    if time() > revalidate_turbo_time:
-                        try:
-                            has_turbo_boost, turbo_charges_left, turbo_next_available_at = await self.get_turbo_status(
-                                http_client=http_client)
-
-                            if has_turbo_boost:
-                                for x in range(turbo_charges_left):
-                                    await self.apply_turbo(http_client=http_client)
-                                    await asyncio.sleep(delay=2)
-                                    resp = await self.update_current_energy(http_client=http_client)
-                                    logger.success(f"{self.session_name} "
-                                                   f"| Successful apply {green}turbo ({1 + x}/{turbo_charges_left}){reset} "
-                                                   f"| Balance: {blue}{resp['current_points']}{reset} "
-                                                   f"| Sleep {sleep_between_clicks}s.")
-                                    await asyncio.sleep(delay=sleep_between_clicks)
-
-                        except Exception as error:
-                            logger.error(f"{self.session_name} | Error while applying turbo boost: {error}")
-
-                        finally:
-                            revalidate_turbo_time = turbo_next_available_at
-                            logger.info(f"{self.session_name} "
-                                        f"| Set {yellow}revalidate turbo{reset} time to "
-                                        f"{yellow}{round((turbo_next_available_at - time()) / 60)} min{yellow}.")
-
                     if current_energy < settings.MIN_AVAILABLE_ENERGY:
-                        if time() > revalidate_energy_boost_time:
-                            try:
-                                has_energy_boost, energy_next_available_at = await self.get_energy_status(
-                                    http_client=http_client)
-
-                                if has_energy_boost:
-                                    await self.recovery_energy(http_client=http_client)
-                                    await self.update_current_energy(http_client=http_client)
-                                else:
-                                    revalidate_energy_boost_time = energy_next_available_at
-                                    logger.info(f"{self.session_name} "
-                                                f"| Set {yellow}revalidate energy{reset} boost time to "
-                                                f"{yellow}{round((energy_next_available_at - time()) / 60)} min{reset}.")
-                                    continue
-
-                            except Exception as error:
-                                logger.error(f"{self.session_name} | Error while applying energy boost: {error}")
-
-                        else:
-                            logger.info(f"{self.session_name} | Minimum energy reached: {current_energy}")
-                            logger.info(f"{self.session_name} | Sleep {settings.SLEEP_BY_MIN_ENERGY}s")
-
-                            await asyncio.sleep(delay=settings.SLEEP_BY_MIN_ENERGY)
-                            continue
+                        # wake up when the energy boost is back if that is sooner than the energy regeneration
+                        sleep_by_min_energy = round(min(settings.SLEEP_BY_MIN_ENERGY,
+                                                        boosts.seconds_until(Boost.ENERGY)))
+
+                        logger.info(f"{self.session_name} | Minimum energy reached: {current_energy}")
+                        logger.info(f"{self.session_name} | Sleep {sleep_by_min_energy}s")
+
+                        await asyncio.sleep(delay=sleep_by_min_energy)
+                        continue
 
                     logger.info(f"{self.session_name} | Sleep {sleep_between_clicks}s")
                     await asyncio.sleep(delay=sleep_between_clicks)
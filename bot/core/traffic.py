@@ -0,0 +1,126 @@
+import os
+import gzip
+import json
+import zlib
+import atexit
+from time import time, monotonic
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from bot.utils.logger import logger
+
+
+REDACTED_KEYS = {'token', 'refresh_token', 'init_data'}
+# seconds between the flushes that make everything written so far readable without the gzip trailer
+FLUSH_INTERVAL = 1
+
+
+def redact(value):
+    if isinstance(value, dict):
+        return {key: '<redacted>' if key in REDACTED_KEYS else redact(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+
+    return value
+
+
+def redact_body(body: bytes) -> str:
+    text = body.decode('utf-8', errors='replace')
+
+    try:
+        return json.dumps(redact(json.loads(text)), separators=(',', ':'))
+    except ValueError:
+        # malformed bodies are kept as they are, replaying them is part of the point
+        return text
+
+
+class TrafficWriter:
+    """Appends every request of the process as one gzipped JSON line to traffic/traffic-<timestamp>.jsonl.gz.
+
+    The stream is fully flushed every FLUSH_INTERVAL seconds, so a killed process loses at most the last second
+    and the file up to there can still be read, only its trailer is missing.
+    """
+
+    def __init__(self, directory: str = 'traffic'):
+        self.directory = directory
+        self._file = None
+        self._flushed_at = 0.0
+
+    def write(self, entry: dict) -> None:
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f'traffic-{int(time())}.jsonl.gz')
+
+            self._file = gzip.open(path, 'ab')
+            atexit.register(self.close)
+            logger.info(f"Recording traffic to {path}")
+
+        self._file.write(json.dumps(entry, separators=(',', ':')).encode('utf-8') + b'\n')
+
+        if monotonic() - self._flushed_at >= FLUSH_INTERVAL:
+            self._file.flush(zlib.Z_FULL_FLUSH)
+            self._flushed_at = monotonic()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+traffic_writer = TrafficWriter()
+
+
+class RecordingSession:
+    """Wraps an aiohttp.ClientSession and records the requests under `api_url` and their responses
+    with the tokens redacted. Headers are not recorded, other requests (like the proxy check) are passed through."""
+
+    def __init__(self, http_client: aiohttp.ClientSession, session_name: str, api_url: str,
+                 writer: TrafficWriter = traffic_writer):
+        self.http_client = http_client
+        self.session_name = session_name
+        self.api_url = api_url
+        self.writer = writer
+
+    @property
+    def headers(self):
+        return self.http_client.headers
+
+    async def __aenter__(self):
+        await self.http_client.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return await self.http_client.__aexit__(*exc_info)
+
+    async def get(self, url: str, **kwargs) -> aiohttp.ClientResponse:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> aiohttp.ClientResponse:
+        return await self.request('POST', url, **kwargs)
+
+    async def request(self, method: str, url: str, **kwargs) -> aiohttp.ClientResponse:
+        if not url.startswith(self.api_url):
+            return await self.http_client.request(method, url, **kwargs)
+
+        entry = {
+            's': self.session_name,
+            't': time(),
+            'm': method,
+            'u': urlsplit(url).path,
+            'q': redact(kwargs.get('json')),
+        }
+        start = monotonic()
+
+        try:
+            response = await self.http_client.request(method, url, **kwargs)
+            body = await response.read()
+        except Exception as error:
+            entry.update(d=monotonic() - start, e=f'{type(error).__name__}: {error}')
+            self.writer.write(entry)
+            raise
+
+        entry.update(d=monotonic() - start, st=response.status, b=redact_body(body))
+        self.writer.write(entry)
+
+        return response
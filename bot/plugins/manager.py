@@ -1,10 +1,15 @@
+import html
+from time import time
+
 from pyrogram import Client, filters
 from pyrogram.types import Message
 
-from bot.utils import scripts
+from bot.config import settings
+from bot.utils import scripts, profiler
 from bot.utils.logger import logger
 from bot.utils.emojis import StaticEmoji
-from bot.utils.launcher import tg_clients, run_tasks
+from bot.utils.stats import fleet_stats
+from bot.utils.launcher import tg_clients, tapper_tasks, run_tasks
 
 
 @Client.on_message(filters.me & filters.chat("me") & filters.command("help", prefixes="/"))
@@ -23,7 +28,9 @@ async def launch_tapper(client: Client, message: Message):
     flags_to_start = ["on", "start"]
     flags_to_stop = ["off", "stop"]
 
-    if flag in flags_to_start:
+    if flag in flags_to_start and tapper_tasks:
+        await message.edit(text=f"<b>{StaticEmoji.DENY} Tapper is already running</b>")
+    elif flag in flags_to_start:
         logger.info(f"The tapper is launched with the command /tap {flag}\n")
 
         await message.edit(
@@ -38,3 +45,67 @@ async def launch_tapper(client: Client, message: Message):
     else:
         await message.edit(
             text=f"<b>{StaticEmoji.DENY} This command only accepts the following arguments: on/off | start/stop</b>")
+
+
+@Client.on_message(filters.me & filters.chat("me") & filters.command("stats", prefixes="/"))
+async def send_stats(_: Client, message: Message):
+    uptime = max(time() - fleet_stats.started_at, 1)
+
+    await message.edit(
+        text=f"<b>{StaticEmoji.FLAG} Fleet stats\n\n"
+             f"Sessions: {len(fleet_stats.sessions)} | paused {fleet_stats.paused}\n"
+             f"Uptime: {round(uptime / 60)} min\n"
+             f"Requests: {fleet_stats.requests} | {fleet_stats.requests / uptime * 60:.1f}/min\n"
+             f"Claims: {fleet_stats.claims} | {fleet_stats.claims / uptime * 60:.1f}/min\n"
+             f"Points: {fleet_stats.points} | {fleet_stats.points / uptime * 3600:.0f}/hour\n"
+             f"Boosts: {fleet_stats.boosts_applied}/{fleet_stats.boosts_granted} | "
+             f"{fleet_stats.boosts_applied / max(fleet_stats.boosts_granted, 1):.0%} utilization\n"
+             f"Errors: {fleet_stats.errors} | {fleet_stats.errors / max(fleet_stats.requests, 1):.1%} of requests</b>")
+
+
+@Client.on_message(filters.me & filters.chat("me") & filters.command(["pause", "resume"], prefixes="/"))
+@scripts.with_args("<b>This command does not work without arguments\n"
+                   "Type <code>/pause session_name</code> or <code>/resume session_name</code></b>")
+async def pause_tapper(_: Client, message: Message):
+    command = message.command[0]
+    session_name = scripts.get_command_args(message, command)
+
+    if session_name not in fleet_stats.sessions:
+        await message.edit(text=f"<b>{StaticEmoji.DENY} Session {session_name} is not running</b>")
+    elif command == "pause":
+        if not fleet_stats.pause(session_name):
+            await message.edit(text=f"<b>{StaticEmoji.DENY} {session_name} is already paused</b>")
+            return
+
+        logger.info(f"{session_name} | Paused with the command /pause\n")
+
+        await message.edit(text=f"<b>{StaticEmoji.ACCEPT} {session_name} paused! {StaticEmoji.STOP}</b>")
+    else:
+        if not fleet_stats.resume(session_name):
+            await message.edit(text=f"<b>{StaticEmoji.DENY} {session_name} is already running</b>")
+            return
+
+        logger.info(f"{session_name} | Resumed with the command /resume\n")
+
+        await message.edit(text=f"<b>{StaticEmoji.ACCEPT} {session_name} resumed! {StaticEmoji.START}</b>")
+
+
+@Client.on_message(filters.me & filters.chat("me") & filters.command("profile", prefixes="/"))
+async def send_profile(_: Client, message: Message):
+    duration = scripts.get_command_args(message, "profile")
+    duration = int(duration) if duration.isdigit() else settings.PROFILE_DURATION
+
+    await message.edit(text=f"<b>{StaticEmoji.LOUDSPEAKER} Recording profile for {duration}s...</b>")
+
+    try:
+        path, top_stacks = await profiler.dump_profile(duration=duration)
+    except RuntimeError as error:
+        await message.edit(text=f"<b>{StaticEmoji.DENY} {error}</b>")
+        return
+
+    top_text = "\n".join(f"{count} - {html.escape(stack.rsplit(';', maxsplit=1)[-1])}" for stack, count in top_stacks)
+    spans_text = html.escape("\n".join(profiler.get_spans_report()[:6]))
+
+    await message.edit(text=f"<b>{StaticEmoji.ACCEPT} Profile saved to <code>{path}</code></b>\n\n"
+                            f"<b>Top frames:</b>\n<code>{top_text}</code>\n\n"
+                            f"<b>Spans:</b>\n<code>{spans_text}</code>")
@@ -0,0 +1,62 @@
+import sys
+import asyncio
+import argparse
+from contextlib import suppress
+
+from bot.config import settings
+from bot.utils.logger import logger
+from bot.soak.server import FaultProfile
+from bot.soak.runner import run_soak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bot.soak",
+                                     description="Run tappers against a local game API that injects faults")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=3600, help="Seconds")
+    parser.add_argument("--report-interval", type=float, default=60, help="Seconds")
+    parser.add_argument("--stuck-after", type=float, default=600,
+                        help="Seconds without a successful claim after which a session is stuck")
+    parser.add_argument("--latency", type=float, nargs=2, default=[0, 0], metavar=("MIN", "MAX"),
+                        help="Response latency range in seconds")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Share of 429 responses")
+    parser.add_argument("--server-errors", type=float, default=0.0, help="Share of 5xx responses")
+    parser.add_argument("--resets", type=float, default=0.0, help="Share of reset connections")
+    parser.add_argument("--expired-tokens", type=float, default=0.0, help="Share of 401 responses")
+    parser.add_argument("--malformed-json", type=float, default=0.0, help="Share of truncated JSON bodies")
+    parser.add_argument("--sleep-between-tap", type=int, nargs=2, metavar=("MIN", "MAX"))
+    parser.add_argument("--quiet", action="store_true", help="Only log the soak reports")
+    args = parser.parse_args()
+
+    if args.sleep_between_tap:
+        settings.SLEEP_BETWEEN_TAP = args.sleep_between_tap
+
+    if args.quiet:
+        logger.remove()
+        logger.add(sink=sys.stdout, filter=lambda record: record["name"].startswith(("bot.soak", "__main__")),
+                   format="<white>{time:YYYY-MM-DD HH:mm:ss}</white> - <white><b>{message}</b></white>")
+
+    faults = FaultProfile(
+        latency=tuple(args.latency),
+        rate_limit_rate=args.rate_limit,
+        server_error_rate=args.server_errors,
+        reset_rate=args.resets,
+        expired_token_rate=args.expired_tokens,
+        malformed_json_rate=args.malformed_json,
+    )
+
+    summary = asyncio.run(run_soak(
+        sessions=args.sessions,
+        duration=args.duration,
+        faults=faults,
+        report_interval=args.report_interval,
+        stuck_after=args.stuck_after,
+    ))
+
+    for line in summary:
+        logger.info(line)
+
+
+if __name__ == '__main__':
+    with suppress(KeyboardInterrupt):
+        main()
@@ -0,0 +1,272 @@
+import sys
+import gzip
+import random
+import json
+import asyncio
+import argparse
+from time import monotonic, process_time
+from collections import Counter, defaultdict
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+import bot.core.boosts
+import bot.core.tapper
+from bot.config import settings
+from bot.core.tapper import Tapper
+from bot.utils.logger import logger
+
+
+def load_traffic(path: str) -> dict[str, list[dict]]:
+    sessions = defaultdict(list)
+
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            for line in file:
+                entry = json.loads(line)
+                sessions[entry['s']].append(entry)
+    except (EOFError, ValueError):
+        # the recording process was killed, everything up to its last flush is still complete
+        logger.warning(f"{path} ends early, replaying the {sum(map(len, sessions.values()))} complete requests")
+
+    return sessions
+
+
+class ReplayResponse:
+    def __init__(self, method: str, url: str, status: int, body: str):
+        self.method = method
+        self.url = URL(url)
+        self.status = status
+        self._body = body.encode('utf-8')
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            request_info = aiohttp.RequestInfo(url=self.url, method=self.method,
+                                               headers=CIMultiDictProxy(CIMultiDict()), real_url=self.url)
+            raise aiohttp.ClientResponseError(request_info=request_info, history=(), status=self.status,
+                                              message='Replayed error')
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self) -> str:
+        return self._body.decode('utf-8')
+
+    async def json(self):
+        return json.loads(self._body)
+
+
+class ReplaySession:
+    """Stands in for aiohttp.ClientSession and answers with the recorded responses of one session.
+
+    Each request gets the oldest recorded response for the same method and path. Requests that were
+    not recorded fail like a lost connection, and once every response is used `exhausted` is set.
+    """
+
+    def __init__(self, entries: list[dict], report: 'ReplayReport'):
+        self.entries = entries
+        self.report = report
+        self.headers = CIMultiDict()
+        self.exhausted = asyncio.Event()
+
+        if not entries:
+            self.exhausted.set()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    async def get(self, url: str, **kwargs) -> ReplayResponse:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> ReplayResponse:
+        return await self.request('POST', url, **kwargs)
+
+    async def request(self, method: str, url: str, **kwargs) -> ReplayResponse:
+        path = URL(url).path
+        index = next((index for index, entry in enumerate(self.entries)
+                      if entry['m'] == method and entry['u'] == path), None)
+
+        self.report.add_request(method=method, path=path, json=kwargs.get('json'), replayed=index is not None,
+                                in_order=index == 0)
+
+        if index is None:
+            raise aiohttp.ClientConnectionError(f'No recorded response for {method} {path}')
+
+        entry = self.entries.pop(index)
+        if not self.entries:
+            self.exhausted.set()
+
+        await asyncio.sleep(entry['d'])
+
+        if 'e' in entry:
+            raise aiohttp.ClientConnectionError(entry['e'])
+
+        response = ReplayResponse(method=method, url=url, status=entry['st'], body=entry['b'])
+
+        if path.endswith('/claim-points') and response.status < 400 and kwargs.get('json'):
+            self.report.points += kwargs['json']['points']
+
+        return response
+
+
+class ReplayTapper(Tapper):
+    def __init__(self, session_name: str, http_client: ReplaySession):
+        self.session_name = session_name
+        self.tg_client = None
+        self.http_client = http_client
+
+    async def get_tg_web_data(self, proxy: str | None) -> str:
+        return '<redacted>'
+
+    def create_http_client(self, proxy: str | None, trace_configs: list[aiohttp.TraceConfig]) -> ReplaySession:
+        return self.http_client
+
+
+class VirtualClock:
+    """Runs the event loop on virtual time that starts when the recording started.
+
+    With a positive speed the virtual time moves `speed` times faster than the real one,
+    with speed 0 the loop jumps straight to the next timer whenever it would wait.
+    """
+
+    def __init__(self, start: float, speed: float):
+        self.start = start
+        self.speed = speed
+        self.virtual_now = 0.0
+        self._real_start = monotonic()
+
+    def time(self) -> float:
+        if self.speed:
+            return (monotonic() - self._real_start) * self.speed
+
+        return self.virtual_now
+
+    def wall_time(self) -> float:
+        return self.start + self.time()
+
+    def install(self, loop: asyncio.AbstractEventLoop) -> None:
+        select = loop._selector.select
+
+        def virtual_select(timeout: float | None = None):
+            if self.speed:
+                return select(timeout / self.speed if timeout else timeout)
+
+            events = select(0)
+            if not events and timeout:
+                self.virtual_now += timeout
+
+            return events
+
+        loop.time = self.time
+        loop._selector.select = virtual_select
+
+        # the tapper and the boost scheduler compare server deadlines with the wall clock
+        bot.core.tapper.time = self.wall_time
+        bot.core.boosts.time = self.wall_time
+
+
+class ReplayReport:
+    def __init__(self):
+        self.requests = 0
+        self.replayed = 0
+        self.out_of_order = 0
+        self.points = 0
+        self.endpoints = Counter()
+        self.decisions: list[tuple] = []
+        self.clock: VirtualClock | None = None
+
+    def add_request(self, method: str, path: str, json: dict | None, replayed: bool, in_order: bool) -> None:
+        self.requests += 1
+        self.replayed += replayed
+        self.out_of_order += replayed and not in_order
+        self.endpoints[f'{method} {path}'] += 1
+        self.decisions.append((round(self.clock.time(), 3), method, path, json))
+
+
+async def replay(path: str, speed: float, decisions_path: str | None = None, seed: int = 0) -> list[str]:
+    # the tap counts and sleeps of the tapper are random, a fixed seed makes the runs comparable
+    random.seed(seed)
+
+    sessions = load_traffic(path)
+    recorded = sum(len(entries) for entries in sessions.values())
+
+    report = ReplayReport()
+    report.clock = VirtualClock(start=min(entries[0]['t'] for entries in sessions.values()), speed=speed)
+    report.clock.install(asyncio.get_running_loop())
+
+    # replays must not add to the history of the real accounts
+    settings.USE_LEDGER = False
+    settings.RECORD_TRAFFIC = False
+
+    http_clients = [ReplaySession(entries=entries, report=report) for entries in sessions.values()]
+    tasks = [asyncio.create_task(ReplayTapper(session_name=session_name, http_client=http_client).run(proxy=None))
+             for session_name, http_client in zip(sessions, http_clients)]
+
+    real_start = monotonic()
+    cpu_start = process_time()
+
+    # tappers that stop asking for the recorded requests are given a while after the recording ends
+    recorded_duration = max(entries[-1]['t'] for entries in sessions.values()) - report.clock.start
+
+    try:
+        await asyncio.wait_for(asyncio.gather(*(http_client.exhausted.wait() for http_client in http_clients)),
+                               timeout=recorded_duration + 600)
+    except asyncio.TimeoutError:
+        logger.warning("Some sessions did not use all of their recorded responses")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    cpu_time = process_time() - cpu_start
+
+    if decisions_path:
+        with open(decisions_path, 'w', encoding='utf-8') as file:
+            file.writelines(json.dumps(decision) + '\n' for decision in report.decisions)
+
+    return [
+        f"Sessions: {len(sessions)} | Recorded requests: {recorded}",
+        f"Virtual time: {report.clock.time():.0f}s | Real time: {monotonic() - real_start:.1f}s",
+        f"Requests: {report.requests} | replayed {report.replayed} | out of order {report.out_of_order} "
+        f"| not recorded {report.requests - report.replayed}",
+        f"Points: {report.points} | requests per point {report.requests / max(report.points, 1):.4f}",
+        f"CPU: {cpu_time:.2f}s | {cpu_time / max(report.requests, 1) * 1000:.3f} ms per request",
+        f"Endpoints: {dict(report.endpoints.most_common())}",
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bot.soak.replay",
+                                     description="Replay recorded traffic through Tapper.run without a network")
+    parser.add_argument("path", help="traffic/traffic-<timestamp>.jsonl.gz recorded with RECORD_TRAFFIC=True")
+    parser.add_argument("--speed", type=float, default=0,
+                        help="1 - recorded speed, N - N times faster, 0 - as fast as possible (default)")
+    parser.add_argument("--decisions", help="Write every request the tapper made, with its virtual time, to this file")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random tap counts and sleeps")
+    parser.add_argument("--quiet", action="store_true", help="Only log the replay report")
+    args = parser.parse_args()
+
+    if args.quiet:
+        logger.remove()
+        logger.add(sink=sys.stdout, filter=lambda record: record["name"] == "__main__",
+                   format="<white>{time:YYYY-MM-DD HH:mm:ss}</white> - <white><b>{message}</b></white>")
+
+    # the virtual clock replaces the selector of the default event loop
+    loop = asyncio.new_event_loop()
+
+    try:
+        summary = loop.run_until_complete(replay(path=args.path, speed=args.speed, decisions_path=args.decisions,
+                                                        seed=args.seed))
+    finally:
+        loop.close()
+
+    for line in summary:
+        logger.info(line)
+
+
+if __name__ == '__main__':
+    main()
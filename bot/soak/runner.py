@@ -0,0 +1,127 @@
+import os
+import asyncio
+from time import time, monotonic
+from collections import Counter
+
+from bot.config import settings
+from bot.core.tapper import Tapper
+from bot.utils.logger import logger
+from bot.soak.server import SoakServer, FaultProfile
+
+
+class SoakTapper(Tapper):
+    def __init__(self, session_name: str, api_url: str):
+        self.session_name = session_name
+        self.tg_client = None
+        self.api_url = api_url
+
+    async def get_tg_web_data(self, proxy: str | None) -> str:
+        return f'user={self.session_name}'
+
+
+def get_rss() -> int:
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class SoakReport:
+    def __init__(self, server: SoakServer, session_names: list[str], stuck_after: float):
+        self.server = server
+        self.session_names = session_names
+        self.stuck_after = stuck_after
+        self.started_at = monotonic()
+        self.start_rss = get_rss()
+        self.windows: list[float] = []
+        self.errors = Counter()
+        self._last_points = 0
+        self._last_at = monotonic()
+
+    def count_error(self, message) -> None:
+        self.errors[message.record['function']] += 1
+
+    def get_stuck_sessions(self) -> list[str]:
+        deadline = time() - self.stuck_after
+        players = self.server.players
+
+        return [name for name in self.session_names if name not in players or players[name].last_claim_at < deadline]
+
+    def snapshot(self) -> None:
+        now = monotonic()
+        points = sum(player.claimed_points for player in self.server.players.values())
+        self.windows.append((points - self._last_points) / (now - self._last_at) * 60)
+        self._last_points, self._last_at = points, now
+
+        requests = self.server.requests
+        logger.info(f"Soak {round(now - self.started_at)}s "
+                    f"| Throughput: {round(self.windows[-1])} points/min "
+                    f"| Requests: {requests['total']} ({requests['ok']} ok) "
+                    f"| Stuck: {len(self.get_stuck_sessions())} "
+                    f"| RSS: {get_rss() / 2 ** 20:.1f} MB")
+
+    def summary(self) -> list[str]:
+        requests = self.server.requests
+        claims = sum(player.claims for player in self.server.players.values())
+        stuck = self.get_stuck_sessions()
+
+        # the first window includes the logins of every session, so it is not a fair baseline
+        windows = self.windows[1:] or self.windows
+        degradation = 1 - windows[-1] / windows[0] if windows and windows[0] else 0
+
+        return [
+            f"Sessions: {len(self.session_names)} | Logged in: {len(self.server.players)} "
+            f"| Duration: {round(monotonic() - self.started_at)}s",
+            f"Throughput: first {round(windows[0]) if windows else 0} points/min "
+            f"| last {round(windows[-1]) if windows else 0} points/min | degradation {degradation:.1%}",
+            f"Requests: {requests['total']} | ok {requests['ok']} | claims {claims} "
+            f"| requests per claim {requests['total'] / max(claims, 1):.2f}",
+            f"Retry amplification: {requests['total'] / max(requests['ok'], 1):.2f}x",
+            f"Injected faults: {dict(self.server.injected)}",
+            f"Tapper errors: {dict(self.errors)}",
+            f"Stuck sessions: {len(stuck)} {stuck[:10]}",
+            f"Memory growth: {(get_rss() - self.start_rss) / 2 ** 20:+.1f} MB",
+        ]
+
+
+async def run_soak(
+    sessions: int,
+    duration: float,
+    faults: FaultProfile,
+    report_interval: float = 60,
+    stuck_after: float = 600,
+) -> list[str]:
+    # soak sessions must not add to the history of the real accounts
+    settings.USE_LEDGER = False
+
+    server = SoakServer(faults=faults)
+    api_url = await server.start()
+    session_names = [f'soak_{number}' for number in range(sessions)]
+    report = SoakReport(server=server, session_names=session_names, stuck_after=stuck_after)
+    sink_id = logger.add(report.count_error, level="ERROR", format="{message}")
+
+    logger.info(f"Soak test started | {sessions} sessions | {duration}s | API: {api_url}")
+
+    tasks = [asyncio.create_task(SoakTapper(session_name=session_name, api_url=api_url).run(proxy=None))
+             for session_name in session_names]
+
+    try:
+        deadline = monotonic() + duration
+
+        while monotonic() + report_interval <= deadline:
+            await asyncio.sleep(delay=report_interval)
+            report.snapshot()
+
+        await asyncio.sleep(delay=max(deadline - monotonic(), 0))
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        logger.remove(sink_id)
+        await server.stop()
+
+    return report.summary()
@@ -0,0 +1,270 @@
+import json
+import random
+import asyncio
+from time import time
+from collections import Counter
+from urllib.parse import parse_qs
+
+from aiohttp import web
+
+
+TURBO_BOOST_ID = 'fc5e40ed-c40b-4cfa-9a1a-9a16a5572d84'
+ENERGY_BOOST_ID = 'd212b229-3fb7-4900-a275-5ae0417e0164'
+
+MAX_ENERGY = 1000
+ENERGY_PER_SECOND = 3
+TOKEN_TTL = 3600
+BOOST_CHARGES = 3
+BOOST_COOLDOWN = 600
+# a guess at the game rules, turbo doubles the claimed points for this long (the TURBO_DURATION default)
+TURBO_DURATION = 20
+
+
+class FaultProfile:
+    def __init__(
+        self,
+        latency: tuple[float, float] = (0.0, 0.0),
+        rate_limit_rate: float = 0.0,
+        server_error_rate: float = 0.0,
+        reset_rate: float = 0.0,
+        expired_token_rate: float = 0.0,
+        malformed_json_rate: float = 0.0,
+    ):
+        self.latency = latency
+        self.rates = {
+            'rate_limit': rate_limit_rate,
+            'server_error': server_error_rate,
+            'reset': reset_rate,
+            'expired_token': expired_token_rate,
+            'malformed_json': malformed_json_rate,
+        }
+
+    def pick(self) -> str | None:
+        roll = random.random()
+
+        for fault, rate in self.rates.items():
+            if roll < rate:
+                return fault
+            roll -= rate
+
+        return None
+
+
+class Player:
+    def __init__(self, name: str):
+        self.name = name
+        self.points = 0
+        self.total_claimed_points = 0
+        self.energy = MAX_ENERGY
+        self.energy_updated_at = time()
+        self.turbo_until = 0
+        self.boosts = {
+            TURBO_BOOST_ID: [BOOST_CHARGES, None],
+            ENERGY_BOOST_ID: [BOOST_CHARGES, None],
+        }
+
+        self.tokens: dict[str, str] = {}
+
+        self.requests = 0
+        self.claims = 0
+        self.claimed_points = 0
+        self.last_claim_at = time()
+
+    def update_energy(self) -> None:
+        now = time()
+        self.energy = min(MAX_ENERGY, self.energy + int((now - self.energy_updated_at) * ENERGY_PER_SECOND))
+        self.energy_updated_at = now
+
+    def to_json(self) -> dict:
+        self.update_energy()
+
+        return {
+            'current_points': self.points,
+            'total_claimed_points': self.total_claimed_points,
+            'current_energy': self.energy,
+        }
+
+
+class SoakServer:
+    """Local stand-in for the game API that injects faults according to a FaultProfile."""
+
+    def __init__(self, faults: FaultProfile):
+        self.faults = faults
+        self.players: dict[str, Player] = {}
+        self.tokens: dict[str, tuple[str, float]] = {}
+        self.requests = Counter()
+        self.injected = Counter()
+        self.app = web.Application(middlewares=[self.inject_faults])
+        self.app.add_routes([
+            web.post('/api/login', self.login),
+            web.get('/api/user', self.get_user),
+            web.post('/api/claim-points', self.claim_points),
+            web.post('/api/apply-boost/{boost_id}', self.apply_boost),
+            web.post('/api/upgrade-ship/{improvement_id}', self.upgrade_ship),
+            web.post('/api/refresh-token', self.refresh_token),
+            web.get('/api/user-boosts-status', self.get_boosts_status),
+            web.post('/api/update-current-energy', self.update_current_energy),
+            web.get('/api/user-current-improvements', self.get_improvements),
+        ])
+        self._runner: web.AppRunner | None = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host=host, port=port)
+        await site.start()
+
+        port = self._runner.addresses[0][1]
+
+        return f'http://{host}:{port}/api'
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+
+    @web.middleware
+    async def inject_faults(self, request: web.Request, handler):
+        self.requests['total'] += 1
+
+        min_latency, max_latency = self.faults.latency
+        if max_latency:
+            await asyncio.sleep(random.uniform(min_latency, max_latency))
+
+        fault = self.faults.pick()
+        if fault:
+            self.injected[fault] += 1
+
+        if fault == 'reset':
+            request.transport.abort()
+            return web.Response()
+        if fault == 'rate_limit':
+            return web.json_response({'message': 'Too Many Requests'}, status=429)
+        if fault == 'server_error':
+            return web.json_response({'message': 'Internal Server Error'}, status=random.choice([500, 502, 503]))
+        if fault == 'expired_token' and request.path != '/api/login':
+            return web.json_response({'message': 'Token expired'}, status=401)
+
+        response = await handler(request)
+
+        if fault == 'malformed_json':
+            # a cut body fails to parse on the client, so it is not counted as ok
+            return web.Response(body=response.body[:len(response.body) // 2],
+                                status=response.status, content_type='application/json')
+
+        if 200 <= response.status < 300:
+            self.requests['ok'] += 1
+
+        return response
+
+    def issue_token(self, player: Player, kind: str) -> str:
+        self.tokens.pop(player.tokens.get(kind), None)
+
+        token = f'{player.name}.{random.getrandbits(64):x}'
+        self.tokens[token] = (player.name, time() + TOKEN_TTL)
+        player.tokens[kind] = token
+
+        return token
+
+    def get_player(self, request: web.Request) -> Player:
+        token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        name, expires_at = self.tokens.get(token, (None, 0))
+
+        if name is None or expires_at < time():
+            raise web.HTTPUnauthorized(text=json.dumps({'message': 'Unauthorized'}), content_type='application/json')
+
+        player = self.players[name]
+        player.requests += 1
+
+        return player
+
+    async def login(self, request: web.Request) -> web.Response:
+        init_data = (await request.json())['init_data']
+        name = parse_qs(init_data)['user'][0]
+
+        player = self.players.get(name)
+        if player is None:
+            player = self.players[name] = Player(name=name)
+        player.requests += 1
+
+        return web.json_response({
+            'user': player.to_json(),
+            'token': self.issue_token(player, 'access'),
+            'refresh_token': self.issue_token(player, 'refresh'),
+            'refresh_token_expires_at': int(time() + TOKEN_TTL),
+        })
+
+    async def get_user(self, request: web.Request) -> web.Response:
+        return web.json_response({'user': self.get_player(request).to_json()})
+
+    async def claim_points(self, request: web.Request) -> web.Response:
+        player = self.get_player(request)
+        points = (await request.json())['points']
+
+        player.update_energy()
+        if not 0 < points <= player.energy:
+            return web.json_response({'message': 'Not enough energy'}, status=400)
+
+        player.energy -= points
+        reward = points * 2 if player.turbo_until > time() else points
+        player.points += reward
+        player.total_claimed_points += reward
+
+        player.claims += 1
+        player.claimed_points += reward
+        player.last_claim_at = time()
+
+        return web.json_response({'user': player.to_json()})
+
+    async def apply_boost(self, request: web.Request) -> web.Response:
+        player = self.get_player(request)
+        boost_id = request.match_info['boost_id']
+        boost = player.boosts.get(boost_id)
+
+        if boost is None or boost[0] == 0:
+            return web.json_response({'message': 'Boost is not available'}, status=400)
+
+        boost[0] -= 1
+        if boost[0] == 0:
+            boost[1] = int(time() + BOOST_COOLDOWN)
+
+        if boost_id == TURBO_BOOST_ID:
+            player.turbo_until = time() + TURBO_DURATION
+        else:
+            player.energy = MAX_ENERGY
+            player.energy_updated_at = time()
+
+        return web.json_response({'user': player.to_json()})
+
+    async def upgrade_ship(self, request: web.Request) -> web.Response:
+        return web.json_response({'user': self.get_player(request).to_json()})
+
+    async def refresh_token(self, request: web.Request) -> web.Response:
+        refresh_token = (await request.json())['refresh_token']
+        name, expires_at = self.tokens.get(refresh_token, (None, 0))
+
+        if name is None or expires_at < time():
+            raise web.HTTPUnauthorized(text=json.dumps({'message': 'Unauthorized'}), content_type='application/json')
+
+        player = self.players[name]
+        player.requests += 1
+
+        return web.json_response({'token': self.issue_token(player, 'access')})
+
+    async def get_boosts_status(self, request: web.Request) -> web.Response:
+        player = self.get_player(request)
+        data = []
+
+        for boost_id, boost in player.boosts.items():
+            if boost[1] is not None and boost[1] <= time():
+                boost[:] = [BOOST_CHARGES, None]
+            data.append({'id': boost_id, 'charges_left': boost[0], 'next_available_at': boost[1]})
+
+        return web.json_response({'data': data})
+
+    async def update_current_energy(self, request: web.Request) -> web.Response:
+        return web.json_response({'user': self.get_player(request).to_json()})
+
+    async def get_improvements(self, request: web.Request) -> web.Response:
+        self.get_player(request)
+
+        return web.json_response({'data': []})
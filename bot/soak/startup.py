@@ -0,0 +1,93 @@
+import sys
+import json
+import asyncio
+import argparse
+import subprocess
+from time import time, perf_counter
+from statistics import median
+
+from bot.utils.logger import logger
+from bot.soak.server import SoakServer, FaultProfile
+
+
+# what a fresh process has to import for each kind of start
+IMPORT_TARGETS = {
+    'cli': 'bot.utils.launcher',
+    'create session': 'bot.core.registrator',
+    'worker': 'bot.core.tapper',
+}
+
+IMPORT_CODE = """
+from time import perf_counter
+start = perf_counter()
+import {module}
+print(perf_counter() - start)
+"""
+
+WORKER_CODE = """
+import sys, asyncio
+from bot.config import settings
+from bot.soak.runner import SoakTapper
+settings.USE_LEDGER = False
+asyncio.run(SoakTapper(session_name='startup', api_url=sys.argv[1]).run(proxy=None))
+"""
+
+
+def measure_import(module: str) -> float:
+    output = subprocess.run([sys.executable, "-c", IMPORT_CODE.format(module=module)],
+                            capture_output=True, text=True, check=True).stdout
+
+    return float(output.strip().splitlines()[-1])
+
+
+async def measure_first_request(timeout: float = 60) -> float:
+    server = SoakServer(faults=FaultProfile())
+    api_url = await server.start()
+
+    start = perf_counter()
+    worker = await asyncio.create_subprocess_exec(sys.executable, "-c", WORKER_CODE, api_url,
+                                                  stdout=asyncio.subprocess.DEVNULL,
+                                                  stderr=asyncio.subprocess.DEVNULL)
+
+    try:
+        while not server.requests['total']:
+            if perf_counter() - start > timeout:
+                raise TimeoutError(f"No request in {timeout}s")
+            if worker.returncode is not None:
+                raise RuntimeError(f"Worker exited with code {worker.returncode}")
+
+            await asyncio.sleep(delay=0.005)
+
+        return perf_counter() - start
+    finally:
+        if worker.returncode is None:
+            worker.kill()
+        await worker.wait()
+        await server.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bot.soak.startup",
+                                     description="Measure import time and time to the first request of a new worker")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Append the results as a JSON line to this file to track them over time")
+    args = parser.parse_args()
+
+    results = {'time': int(time())}
+
+    for name, module in IMPORT_TARGETS.items():
+        results[f'import {name}'] = median(measure_import(module) for _ in range(args.runs))
+
+    results['first request'] = median(asyncio.run(measure_first_request()) for _ in range(args.runs))
+
+    for name, value in results.items():
+        if name != 'time':
+            logger.info(f"{name}: {value * 1000:.0f} ms")
+
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as file:
+            file.write(json.dumps(results) + "\n")
+
+
+if __name__ == '__main__':
+    main()
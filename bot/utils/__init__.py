@@ -1,10 +1,18 @@
+import os
+import importlib
+
 from .logger import logger
-from . import launcher
-from . import scripts
-from . import emojis
 
+# launcher and scripts pull in Pyrogram, aiohttp and the tapper, so they are loaded on first access
+_lazy_modules = ("launcher", "scripts", "emojis")
+
+
+def __getattr__(name: str):
+    if name in _lazy_modules:
+        return importlib.import_module(f".{name}", __name__)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-import os
 
 if not os.path.exists(path="sessions"):
     os.mkdir(path="sessions")
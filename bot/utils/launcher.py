@@ -1,16 +1,24 @@
+from __future__ import annotations
+
 import os
 import glob
 import asyncio
 import argparse
 from itertools import cycle
-
-from pyrogram import Client, compose
-from better_proxy import Proxy
+from collections import Counter
+from typing import TYPE_CHECKING
 
 from bot.config import settings
 from bot.utils import logger
-from bot.core.tapper import run_tapper
-from bot.core.registrator import register_sessions
+from bot.utils.storage import session_storage
+from bot.utils.watcher import watch_config, PROXIES_PATH
+from bot.utils import profiler
+
+# Pyrogram, aiohttp and the tapper are imported by the actions that need them,
+# so listing sessions or starting a worker does not pay for all of them
+if TYPE_CHECKING:
+    from pyrogram import Client
+    from better_proxy import Proxy
 
 
 start_text = """
@@ -24,23 +32,37 @@ Select an action:
     1. Create session
     2. Run clicker
     3. Run via Telegram (Beta)
+    4. Import session files into sessions.db
+    5. Export sessions.db into session files
+    6. Show ledger report
 """
 
 global tg_clients
 
+tapper_tasks: dict[str, asyncio.Task] = {}
+session_proxies: dict[str, str | None] = {}
+clients_by_name: dict[str, Client] = {}
+
+
 def get_session_names() -> list[str]:
+    if settings.SESSION_STORAGE == 'db':
+        return session_storage.get_names()
+
     session_names = glob.glob("sessions/*.session")
-    session_names = [
+    # sorted like the names from sessions.db, so the default COMMAND_SESSION is the same on every run
+    session_names = sorted(
         os.path.splitext(os.path.basename(file))[0] for file in session_names
-    ]
+    )
 
     return session_names
 
 
 def get_proxies() -> list[Proxy]:
     if settings.USE_PROXY_FROM_FILE:
-        with open(file="bot/config/proxies.txt", encoding="utf-8-sig") as file:
-            proxies = [Proxy.from_str(proxy=row.strip()).as_url for row in file]
+        from better_proxy import Proxy
+
+        with open(file=PROXIES_PATH, encoding="utf-8-sig") as file:
+            proxies = [Proxy.from_str(proxy=row.strip()).as_url for row in file if row.strip()]
     else:
         proxies = []
 
@@ -48,25 +70,37 @@ def get_proxies() -> list[Proxy]:
 
 
 async def get_tg_clients() -> list[Client]:
+    from pyrogram import Client
+
     global tg_clients
 
-    session_names = get_session_names()
+    if settings.SESSION_STORAGE == 'db':
+        session_strings = session_storage.load()
+    else:
+        session_strings = dict.fromkeys(get_session_names())
 
-    if not session_names:
+    if not session_strings:
         raise FileNotFoundError("Not found session files")
 
     if not settings.API_ID or not settings.API_HASH:
         raise ValueError("API_ID and API_HASH not found in the .env file.")
 
+    # only one client loads the plugins, so a command is handled once for the whole fleet
+    command_session = settings.COMMAND_SESSION or next(iter(session_strings))
+
+    if command_session not in session_strings:
+        raise ValueError(f"COMMAND_SESSION {command_session} not found in the sessions.")
+
     tg_clients = [
         Client(
             name=session_name,
             api_id=settings.API_ID,
             api_hash=settings.API_HASH,
             workdir="sessions/",
-            plugins=dict(root="bot/plugins"),
+            session_string=session_string,
+            plugins=dict(root="bot/plugins") if session_name == command_session else None,
         )
-        for session_name in session_names
+        for session_name, session_string in session_strings.items()
     ]
 
     return tg_clients
@@ -88,37 +122,103 @@ async def process() -> None:
 
             if not action.isdigit():
                 logger.warning("Action must be number")
-            elif action not in ["1", "2", "3"]:
-                logger.warning("Action must be 1, 2 or 3")
+            elif action not in ["1", "2", "3", "4", "5", "6"]:
+                logger.warning("Action must be 1, 2, 3, 4, 5 or 6")
             else:
                 action = int(action)
                 break
 
+    if settings.ENABLE_PROFILING and action in (2, 3):
+        profiler.start()
+
     if action == 1:
+        from bot.core.registrator import register_sessions
+
         await register_sessions()
     elif action == 2:
         tg_clients = await get_tg_clients()
 
         await run_tasks(tg_clients=tg_clients)
     elif action == 3:
+        from pyrogram import compose
+
         tg_clients = await get_tg_clients()
 
-        logger.info("Send /help command in Saved Messages\n")
+        command_session = settings.COMMAND_SESSION or tg_clients[0].name
+        logger.info(f"Send /help command in Saved Messages of {command_session}\n")
 
         await compose(tg_clients)
+    elif action == 4:
+        from bot.utils.storage import import_session_files
+
+        await import_session_files()
+    elif action == 5:
+        from bot.utils.storage import export_session_files
+
+        await export_session_files()
+    elif action == 6:
+        from bot.utils.ledger import get_report
+
+        print(get_report())
+
+
+def start_tapper(tg_client: Client, proxy: str | None) -> None:
+    from bot.core.tapper import run_tapper
+
+    session_proxies[tg_client.name] = proxy
+    tapper_tasks[tg_client.name] = asyncio.create_task(run_tapper(tg_client=tg_client, proxy=proxy))
+
+
+async def migrate_proxies() -> None:
+    proxies = get_proxies()
+    proxies_load = Counter({proxy: 0 for proxy in proxies})
+    proxies_load.update(proxy for proxy in session_proxies.values() if proxy in proxies_load)
+
+    migrated = 0
+
+    for session_name, proxy in list(session_proxies.items()):
+        if proxy in proxies_load or (proxy is None and not proxies):
+            continue
+
+        new_proxy = None
+        if proxies:
+            new_proxy = min(proxies_load, key=proxies_load.get)
+            proxies_load[new_proxy] += 1
+
+        logger.info(f"{session_name} | Proxy changed: {proxy} -> {new_proxy}")
+
+        task = tapper_tasks.get(session_name)
+        if task and not task.done():
+            task.cancel()
+
+        start_tapper(tg_client=clients_by_name[session_name], proxy=new_proxy)
+        migrated += 1
+
+    logger.info(f"Proxies reloaded | {len(proxies)} proxies | {migrated} sessions migrated")
 
 
 async def run_tasks(tg_clients: list[Client]):
+    # a second run would orphan the running tappers and start another watcher
+    if tapper_tasks:
+        logger.warning("Tapper is already running")
+        return
+
     proxies = get_proxies()
     proxies_cycle = cycle(proxies) if proxies else None
-    tasks = [
-        asyncio.create_task(
-            run_tapper(
-                tg_client=tg_client,
-                proxy=next(proxies_cycle) if proxies_cycle else None,
-            )
-        )
-        for tg_client in tg_clients
-    ]
 
-    await asyncio.gather(*tasks)
+    for tg_client in tg_clients:
+        clients_by_name[tg_client.name] = tg_client
+        start_tapper(tg_client=tg_client, proxy=next(proxies_cycle) if proxies_cycle else None)
+
+    watcher_task = asyncio.create_task(watch_config(on_proxies_change=migrate_proxies))
+
+    try:
+        while tapper_tasks:
+            done, _ = await asyncio.wait(tapper_tasks.values(), return_when=asyncio.FIRST_COMPLETED)
+
+            for session_name, task in list(tapper_tasks.items()):
+                if task in done:
+                    del tapper_tasks[session_name]
+                    del session_proxies[session_name]
+    finally:
+        watcher_task.cancel()
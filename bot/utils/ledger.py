@@ -0,0 +1,289 @@
+import os
+import json
+import mmap
+import struct
+import atexit
+from time import time
+from enum import IntEnum
+from urllib.parse import urlsplit
+from collections import defaultdict
+
+from bot.config import settings
+from bot.utils.logger import logger
+
+
+class LedgerKind(IntEnum):
+    LOGIN = 0
+    CLAIM = 1
+    TURBO = 2
+    ENERGY = 3
+
+
+# timestamp, account id, proxy id, kind, requests since the previous record, points delta, balance
+RAW_RECORD = struct.Struct('<IIHBxIiq')
+# bucket timestamp, account id, proxy id, requests, claims, boosts, points
+ROLLUP_RECORD = struct.Struct('<IIHxxIIIq')
+
+
+class SegmentedArray:
+    """Append-only array of fixed-width records split into preallocated, memory-mapped segment files.
+
+    Only the newest `max_segments` segments are kept, older ones are deleted when a new one is started.
+    """
+
+    HEADER = struct.Struct('<4sHHQ')
+    MAGIC = b'PRLG'
+
+    def __init__(self, directory: str, record: struct.Struct, segment_records: int, max_segments: int | None = None):
+        self.directory = directory
+        self.record = record
+        self.segment_records = segment_records
+        self.max_segments = max_segments
+
+        self._segment: mmap.mmap | None = None
+        self._segment_number = 0
+        self._count = 0
+
+    def get_segments(self) -> list[str]:
+        if not os.path.isdir(self.directory):
+            return []
+
+        return sorted(os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                      if name.endswith('.seg'))
+
+    def _open_segment(self, path: str) -> None:
+        size = self.HEADER.size + self.record.size * self.segment_records
+
+        with open(path, 'a+b') as file:
+            if os.path.getsize(path) < size:
+                file.truncate(size)
+            self._segment = mmap.mmap(file.fileno(), size)
+
+        magic, _, _, count = self.HEADER.unpack_from(self._segment)
+        if magic != self.MAGIC:
+            self.HEADER.pack_into(self._segment, 0, self.MAGIC, 1, self.record.size, 0)
+            count = 0
+
+        self._count = count
+
+    def _next_segment(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._segment_number += 1
+        self._open_segment(os.path.join(self.directory, f'{self._segment_number:08d}.seg'))
+
+        segments = self.get_segments()
+        if self.max_segments:
+            for path in segments[:-self.max_segments]:
+                os.remove(path)
+
+    def append(self, *values) -> tuple[int, int]:
+        if self._segment is None:
+            segments = self.get_segments()
+
+            if segments:
+                self._segment_number = int(os.path.basename(segments[-1]).split('.')[0])
+                self._open_segment(segments[-1])
+            else:
+                self._next_segment()
+
+        if self._count >= self.segment_records:
+            self._next_segment()
+
+        self.record.pack_into(self._segment, self.HEADER.size + self._count * self.record.size, *values)
+        self._count += 1
+        struct.pack_into('<Q', self._segment, 8, self._count)
+
+        return self._segment_number, self._count - 1
+
+    def update(self, position: tuple[int, int], *values) -> bool:
+        """Overwrites a record returned by `append`, fails once its segment is no longer the open one."""
+        segment_number, index = position
+
+        if self._segment is None or segment_number != self._segment_number:
+            return False
+
+        self.record.pack_into(self._segment, self.HEADER.size + index * self.record.size, *values)
+
+        return True
+
+    def scan(self):
+        for path in self.get_segments():
+            with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as segment:
+                count = self.HEADER.unpack_from(segment)[3]
+                data = segment[self.HEADER.size:self.HEADER.size + count * self.record.size]
+
+            yield from self.record.iter_unpack(data)
+
+    def close(self) -> None:
+        if self._segment is not None:
+            self._segment.flush()
+            self._segment.close()
+            self._segment = None
+
+
+class Ledger:
+    def __init__(self, directory: str = 'ledger'):
+        self.directory = directory
+
+        # raw ~28 MB and minute rollups ~32 MB per segment, hourly rollups are kept forever
+        self.raw = SegmentedArray(os.path.join(directory, 'raw'), RAW_RECORD, 1 << 20, max_segments=4)
+        self.minutes = SegmentedArray(os.path.join(directory, 'minute'), ROLLUP_RECORD, 1 << 20, max_segments=4)
+        self.hours = SegmentedArray(os.path.join(directory, 'hour'), ROLLUP_RECORD, 1 << 16)
+
+        self.accounts, self.proxies = self.load_names()
+        self._ids = {
+            'accounts': {name: index for index, name in enumerate(self.accounts)},
+            'proxies': {name: index for index, name in enumerate(self.proxies)},
+        }
+        self._balances: dict[int, int] = {}
+        # the open bucket of each rollup: (account id, proxy id) -> requests, claims, boosts, points, position
+        self._buckets = {self.minutes: (0, {}), self.hours: (0, {})}
+
+    def load_names(self) -> tuple[list[str], list[str]]:
+        try:
+            with open(os.path.join(self.directory, 'names.json'), encoding='utf-8') as file:
+                names = json.load(file)
+            return names['accounts'], names['proxies']
+        except FileNotFoundError:
+            return [], ['']
+
+    def get_id(self, kind: str, name: str) -> int:
+        ids = self._ids[kind]
+
+        if name in ids:
+            return ids[name]
+
+        names = getattr(self, kind)
+        ids[name] = len(names)
+        names.append(name)
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, 'names.json')
+
+        with open(path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump({'accounts': self.accounts, 'proxies': self.proxies}, file)
+        os.replace(path + '.tmp', path)
+
+        return len(names) - 1
+
+    def record(self, session_name: str, proxy: str | None, kind: LedgerKind,
+               balance: int | None = None, requests: int = 0) -> None:
+        now = int(time())
+        account_id = self.get_id('accounts', session_name)
+        # only host:port, the proxy credentials are not written to disk
+        proxy_id = self.get_id('proxies', urlsplit(proxy).netloc.rsplit('@', maxsplit=1)[-1] if proxy else '')
+
+        last_balance = self._balances.get(account_id)
+        balance = last_balance if balance is None else int(balance)
+        points = balance - last_balance if balance is not None and last_balance is not None else 0
+        self._balances[account_id] = balance
+
+        self.raw.append(now, account_id, proxy_id, kind, requests, points, balance or 0)
+
+        increments = (requests, int(kind == LedgerKind.CLAIM), int(kind in (LedgerKind.TURBO, LedgerKind.ENERGY)),
+                      points)
+
+        for store, bucket_size in ((self.minutes, 60), (self.hours, 3600)):
+            bucket_ts = now - now % bucket_size
+            current_ts, buckets = self._buckets[store]
+
+            if current_ts != bucket_ts:
+                buckets = {}
+                self._buckets[store] = (bucket_ts, buckets)
+
+            # the open bucket is kept up to date in the mapped segment, so a killed process does not lose it
+            bucket = buckets.get((account_id, proxy_id))
+            if bucket is not None:
+                totals = [total + increment for total, increment in zip(bucket, increments)]
+
+                if store.update(bucket[4], bucket_ts, account_id, proxy_id, *totals):
+                    bucket[:4] = totals
+                    continue
+
+            # the record of a bucket whose segment filled up stays there, so the new one only counts from this event
+            position = store.append(bucket_ts, account_id, proxy_id, *increments)
+            buckets[account_id, proxy_id] = [*increments, position]
+
+    def close(self) -> None:
+        for store in (self.raw, self.minutes, self.hours):
+            store.close()
+
+
+class LedgerSink:
+    """Feeds the ledger from the tapper, does nothing when USE_LEDGER is off."""
+
+    def __init__(self):
+        self._ledger: Ledger | None = None
+
+    def record(self, *args, **kwargs) -> None:
+        if not settings.USE_LEDGER:
+            return
+
+        if self._ledger is None:
+            self._ledger = Ledger()
+            atexit.register(self._ledger.close)
+
+        try:
+            self._ledger.record(*args, **kwargs)
+        except Exception as error:
+            logger.error(f"Unknown error while writing ledger: {error}")
+
+
+ledger = LedgerSink()
+
+
+def get_report(directory: str = 'ledger', hours: int | None = None) -> str:
+    ledger = Ledger(directory=directory)
+    since = time() - hours * 3600 if hours else 0
+
+    # every restart and every proxy of an account writes its own record for the hour, they are merged first
+    account_hours = defaultdict(lambda: [0, 0, 0, 0])
+    proxy_hours = defaultdict(lambda: [0, 0, 0, 0])
+
+    for bucket_ts, account_id, proxy_id, requests, claims, boosts, points in ledger.hours.scan():
+        if bucket_ts < since:
+            continue
+
+        for hour in (account_hours[account_id, bucket_ts], proxy_hours[proxy_id, bucket_ts]):
+            hour[0] += requests
+            hour[1] += claims
+            hour[2] += boosts
+            hour[3] += points
+
+    # requests, claims, boosts, points, hours, boosted hours, boosted points
+    by_account = defaultdict(lambda: [0, 0, 0, 0, 0, 0, 0])
+    by_proxy = defaultdict(lambda: [0, 0, 0, 0, 0, 0, 0])
+
+    for hours_by_id, totals_by_id in ((account_hours, by_account), (proxy_hours, by_proxy)):
+        for (item_id, _), (requests, claims, boosts, points) in hours_by_id.items():
+            totals = totals_by_id[item_id]
+            totals[0] += requests
+            totals[1] += claims
+            totals[2] += boosts
+            totals[3] += points
+            totals[4] += 1
+            if boosts:
+                totals[5] += 1
+                totals[6] += points
+
+    lines = []
+
+    for title, names, totals in (('Account', ledger.accounts, by_account), ('Proxy', ledger.proxies, by_proxy)):
+        lines.append(f"{title:<32} {'points':>12} {'pts/hour':>10} {'pts/req':>8} {'claims':>8} "
+                     f"{'boosts':>7} {'boost ROI':>10}")
+
+        for item_id, (requests, claims, boosts, points, active, boosted, boosted_points) in sorted(
+                totals.items(), key=lambda item: item[1][3], reverse=True):
+            # ROI of boosts - how much more an hour with boosts earned than an hour without them
+            plain_rate = (points - boosted_points) / (active - boosted) if active > boosted else 0
+            roi = f"{(boosted_points / boosted) / plain_rate - 1:+.0%}" if boosted and plain_rate else "-"
+
+            lines.append(f"{(names[item_id] or 'no proxy')[:32]:<32} {points:>12} {points / active:>10.1f} "
+                         f"{points / max(requests, 1):>8.2f} {claims:>8} {boosts:>7} {roi:>10}")
+
+        lines.append("")
+
+    return "\n".join(lines)
@@ -0,0 +1,184 @@
+import os
+import sys
+import signal
+import asyncio
+import threading
+import traceback
+from time import time, perf_counter, monotonic, sleep
+from collections import Counter
+from functools import wraps
+
+from bot.config import settings
+from bot.utils.logger import logger
+
+
+LOOP_LAG_INTERVAL = 0.5
+SAMPLE_INTERVAL = 0.01
+
+
+class Span:
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, elapsed: float) -> None:
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+
+spans: dict[str, Span] = {}
+loop_lag = Span()
+
+_loop_thread_id: int | None = None
+_profiling_lock = threading.Lock()
+_monitor_task: asyncio.Task | None = None
+
+
+def timed(func):
+    name = func.__qualname__
+
+    @wraps(func)
+    async def wrapped(*args, **kwargs):
+        if not settings.ENABLE_PROFILING:
+            return await func(*args, **kwargs)
+
+        start = perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            span = spans.get(name)
+            if span is None:
+                span = spans[name] = Span()
+            span.add(perf_counter() - start)
+
+    return wrapped
+
+
+async def monitor_loop_lag() -> None:
+    while True:
+        start = monotonic()
+        await asyncio.sleep(delay=LOOP_LAG_INTERVAL)
+
+        lag = monotonic() - start - LOOP_LAG_INTERVAL
+        loop_lag.add(lag)
+
+        if lag > settings.LOOP_LAG_THRESHOLD:
+            logger.warning(f"Event loop lag: {lag * 1000:.0f} ms")
+
+
+def watch_slow_callbacks(loop: asyncio.AbstractEventLoop) -> None:
+    while True:
+        handled = threading.Event()
+        loop.call_soon_threadsafe(handled.set)
+
+        if handled.wait(timeout=settings.LOOP_LAG_THRESHOLD):
+            sleep(LOOP_LAG_INTERVAL)
+            continue
+
+        frame = sys._current_frames().get(_loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame else "unavailable"
+        blocked_since = monotonic() - settings.LOOP_LAG_THRESHOLD
+
+        handled.wait()
+        blocked_for = monotonic() - blocked_since
+
+        logger.opt(colors=False).warning(f"Event loop blocked for at least {blocked_for * 1000:.0f} ms, "
+                                         f"callback stack:\n{stack}")
+
+
+def get_stack_key(frame) -> str:
+    stack = []
+
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+
+    return ";".join(reversed(stack))
+
+
+def get_spans_report() -> list[str]:
+    lines = [f"loop lag: avg {loop_lag.total / max(loop_lag.count, 1) * 1000:.1f} ms "
+             f"| max {loop_lag.max * 1000:.1f} ms"]
+
+    for name, span in sorted(spans.items(), key=lambda item: item[1].total, reverse=True):
+        lines.append(f"{name}: {span.count} calls "
+                     f"| avg {span.total / span.count * 1000:.1f} ms "
+                     f"| max {span.max * 1000:.1f} ms")
+
+    return lines
+
+
+def sample_profile(duration: float) -> tuple[str, list[tuple[str, int]]]:
+    """Samples the event loop thread for `duration` seconds and writes the collapsed stacks
+    (flamegraph.pl / speedscope format) together with the span timings to profiles/."""
+    if not _profiling_lock.acquire(blocking=False):
+        raise RuntimeError("Profile is already being recorded")
+
+    try:
+        samples = Counter()
+        deadline = monotonic() + duration
+
+        while monotonic() < deadline:
+            frame = sys._current_frames().get(_loop_thread_id)
+            if frame is not None:
+                samples[get_stack_key(frame)] += 1
+            sleep(SAMPLE_INTERVAL)
+
+        os.makedirs("profiles", exist_ok=True)
+        path = f"profiles/profile-{int(time())}.txt"
+
+        with open(path, "w", encoding="utf-8") as file:
+            file.writelines(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+        with open(path.replace(".txt", "-spans.txt"), "w", encoding="utf-8") as file:
+            file.writelines(f"{line}\n" for line in get_spans_report())
+
+        return path, samples.most_common(5)
+    finally:
+        _profiling_lock.release()
+
+
+async def dump_profile(duration: float | None = None) -> tuple[str, list[tuple[str, int]]]:
+    global _loop_thread_id
+
+    # profiles can be requested with /profile even when the monitors were not started
+    if _loop_thread_id is None:
+        _loop_thread_id = threading.get_ident()
+
+    duration = duration or settings.PROFILE_DURATION
+    logger.info(f"Recording profile for {duration}s")
+
+    path, top_stacks = await asyncio.to_thread(sample_profile, duration)
+
+    logger.success(f"Profile saved to {path}")
+
+    return path, top_stacks
+
+
+async def on_profile_signal() -> None:
+    try:
+        await dump_profile()
+    except RuntimeError as error:
+        logger.warning(f"{error}")
+
+
+def start() -> None:
+    global _loop_thread_id, _monitor_task
+
+    _loop_thread_id = threading.get_ident()
+    loop = asyncio.get_running_loop()
+
+    _monitor_task = loop.create_task(monitor_loop_lag())
+    threading.Thread(target=watch_slow_callbacks, args=(loop,), name="slow-callback-watchdog", daemon=True).start()
+
+    if hasattr(signal, "SIGUSR1"):
+        loop.add_signal_handler(signal.SIGUSR1, lambda: loop.create_task(on_profile_signal()))
+
+    logger.info(f"Profiling enabled | loop: {type(loop).__module__} "
+                f"| send SIGUSR1 to pid {os.getpid()} to record a profile")
@@ -48,6 +48,10 @@ def get_help_text():
 
 {num(1)} /help - Displays all available commands
 {num(2)} /tap [on|start, off|stop] - Starts or stops the tapper
+{num(3)} /stats - Shows throughput and errors of the whole fleet
+{num(4)} /pause [session] - Pauses the tapper of a session
+{num(5)} /resume [session] - Resumes the tapper of a session
+{num(6)} /profile [seconds] - Records a profile of the event loop
 
 </b>"""
 
@@ -0,0 +1,92 @@
+import asyncio
+from time import time
+
+
+class SessionStats:
+    __slots__ = ("requests", "errors", "claims", "points", "last_claim_at", "boosts_granted", "boosts_applied",
+                 "resumed")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.claims = 0
+        self.points = 0
+        self.last_claim_at = 0.0
+        self.boosts_granted = 0
+        self.boosts_applied = 0
+        self.resumed = asyncio.Event()
+        self.resumed.set()
+
+
+class FleetStats:
+    """In-memory counters shared by every tapper of the process.
+
+    Fleet totals are updated together with the session counters, so reading them never walks the sessions.
+    """
+
+    def __init__(self):
+        self.sessions: dict[str, SessionStats] = {}
+        self.started_at = time()
+        self.requests = 0
+        self.errors = 0
+        self.claims = 0
+        self.points = 0
+        self.boosts_granted = 0
+        self.boosts_applied = 0
+        self.paused = 0
+
+    def get(self, session_name: str) -> SessionStats:
+        stats = self.sessions.get(session_name)
+
+        if stats is None:
+            stats = self.sessions[session_name] = SessionStats()
+
+        return stats
+
+    def add_request(self, stats: SessionStats) -> None:
+        stats.requests += 1
+        self.requests += 1
+
+    def add_error(self, stats: SessionStats) -> None:
+        stats.errors += 1
+        self.errors += 1
+
+    def add_claim(self, stats: SessionStats, points: int) -> None:
+        stats.claims += 1
+        stats.points += points
+        stats.last_claim_at = time()
+        self.claims += 1
+        self.points += points
+
+    def add_boosts_granted(self, stats: SessionStats, charges: int) -> None:
+        stats.boosts_granted += charges
+        self.boosts_granted += charges
+
+    def add_boost_applied(self, stats: SessionStats) -> None:
+        stats.boosts_applied += 1
+        self.boosts_applied += 1
+
+    def pause(self, session_name: str) -> bool:
+        stats = self.sessions.get(session_name)
+
+        if stats is None or not stats.resumed.is_set():
+            return False
+
+        stats.resumed.clear()
+        self.paused += 1
+
+        return True
+
+    def resume(self, session_name: str) -> bool:
+        stats = self.sessions.get(session_name)
+
+        if stats is None or stats.resumed.is_set():
+            return False
+
+        stats.resumed.set()
+        self.paused -= 1
+
+        return True
+
+
+fleet_stats = FleetStats()
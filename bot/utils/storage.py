@@ -0,0 +1,132 @@
+import os
+import glob
+import sqlite3
+from pathlib import Path
+
+from bot.config import settings
+from bot.utils.logger import logger
+
+
+class SessionStorage:
+    """All Pyrogram sessions in one indexed SQLite database, stored as session strings.
+
+    Clients built from these strings use Pyrogram's in-memory storage, so a running
+    fleet holds a single database handle no matter how many sessions it has.
+    """
+
+    def __init__(self, path: str = "sessions/sessions.db"):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "name TEXT PRIMARY KEY, "
+                "session_string TEXT NOT NULL, "
+                "updated_at INTEGER NOT NULL DEFAULT (strftime('%s', 'now')))"
+            )
+
+        return self._conn
+
+    def get_names(self) -> list[str]:
+        return [row[0] for row in self.conn.execute("SELECT name FROM sessions ORDER BY name")]
+
+    def load(self) -> dict[str, str]:
+        return dict(self.conn.execute("SELECT name, session_string FROM sessions ORDER BY name"))
+
+    def save(self, name: str, session_string: str) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO sessions (name, session_string) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET "
+                "session_string = excluded.session_string, updated_at = strftime('%s', 'now')",
+                (name, session_string),
+            )
+
+    def delete(self, name: str) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM sessions WHERE name = ?", (name,))
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+session_storage = SessionStorage()
+
+
+async def import_session_files(workdir: str = "sessions/") -> int:
+    from pyrogram.storage import FileStorage
+
+    session_files = glob.glob(os.path.join(workdir, "*.session"))
+    imported = 0
+
+    for file in session_files:
+        name = os.path.splitext(os.path.basename(file))[0]
+        storage = FileStorage(name=name, workdir=Path(workdir))
+
+        try:
+            await storage.open()
+
+            if await storage.auth_key() is None:
+                logger.warning(f"{name} | Session file is not authorized, skipped")
+                continue
+
+            # Sessions created before Pyrogram storage v3 have no api_id
+            if not await storage.api_id():
+                await storage.api_id(settings.API_ID)
+
+            session_storage.save(name=name, session_string=await storage.export_session_string())
+            imported += 1
+        except Exception as error:
+            logger.error(f"{name} | Unknown error while importing session file: {error}")
+        finally:
+            await storage.close()
+
+    logger.success(f"Imported {imported}/{len(session_files)} session files into {session_storage.path}")
+
+    return imported
+
+
+async def export_session_files(workdir: str = "sessions/") -> int:
+    from pyrogram.storage import FileStorage, MemoryStorage
+
+    sessions = session_storage.load()
+    exported = 0
+
+    for name, session_string in sessions.items():
+        if os.path.exists(os.path.join(workdir, name + FileStorage.FILE_EXTENSION)):
+            logger.warning(f"{name} | Session file already exists, skipped")
+            continue
+
+        memory_storage = MemoryStorage(name=name, session_string=session_string)
+        file_storage = FileStorage(name=name, workdir=Path(workdir))
+
+        try:
+            await memory_storage.open()
+            await file_storage.open()
+
+            await file_storage.dc_id(await memory_storage.dc_id())
+            await file_storage.api_id(await memory_storage.api_id())
+            await file_storage.test_mode(await memory_storage.test_mode())
+            await file_storage.auth_key(await memory_storage.auth_key())
+            await file_storage.user_id(await memory_storage.user_id())
+            await file_storage.is_bot(await memory_storage.is_bot())
+            await file_storage.date(0)
+            await file_storage.save()
+
+            exported += 1
+        except Exception as error:
+            logger.error(f"{name} | Unknown error while exporting session: {error}")
+        finally:
+            await memory_storage.close()
+            await file_storage.close()
+
+    logger.success(f"Exported {exported}/{len(sessions)} sessions from {session_storage.path} to {workdir}")
+
+    return exported
@@ -0,0 +1,52 @@
+import os
+import asyncio
+from typing import Awaitable, Callable
+
+from bot.config import settings, reload_settings, RESTART_REQUIRED
+from bot.utils.logger import logger
+
+
+ENV_PATH = ".env"
+PROXIES_PATH = "bot/config/proxies.txt"
+
+
+def get_mtime(path: str) -> float:
+    try:
+        return os.stat(path).st_mtime
+    except FileNotFoundError:
+        return 0
+
+
+async def watch_config(on_proxies_change: Callable[[], Awaitable[None]]) -> None:
+    mtimes = {path: get_mtime(path) for path in (ENV_PATH, PROXIES_PATH)}
+
+    while settings.CONFIG_RELOAD_INTERVAL > 0:
+        await asyncio.sleep(delay=settings.CONFIG_RELOAD_INTERVAL)
+
+        changed_files = [path for path in mtimes if get_mtime(path) != mtimes[path]]
+        mtimes.update((path, get_mtime(path)) for path in changed_files)
+
+        reload_proxies = PROXIES_PATH in changed_files
+
+        if ENV_PATH in changed_files:
+            try:
+                changed = reload_settings()
+            except ValueError as error:
+                # invalid values (ValidationError) and unparsable lists (SettingsError) are both ValueErrors,
+                # the proxies are still reloaded, their mtime is already consumed
+                logger.error(f"Invalid {ENV_PATH}, keeping the current settings: {error}")
+                changed = []
+
+            for name in changed:
+                if name in RESTART_REQUIRED:
+                    logger.warning(f"Setting {name} changed, restart to apply it")
+                else:
+                    logger.info(f"Setting {name} reloaded: {getattr(settings, name)}")
+
+            reload_proxies = reload_proxies or 'USE_PROXY_FROM_FILE' in changed
+
+        if reload_proxies:
+            try:
+                await on_proxies_change()
+            except Exception as error:
+                logger.error(f"Unknown error while reloading proxies, keeping the current ones: {error}")
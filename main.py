@@ -1,13 +1,28 @@
 import asyncio
 from contextlib import suppress
 
+from bot.config import settings
 from bot.utils.launcher import process
+from bot.utils.logger import logger
 
 
 async def main():
     await process()
 
 
+def install_uvloop() -> None:
+    try:
+        import uvloop
+    except ImportError:
+        logger.warning("USE_UVLOOP is enabled but uvloop is not installed, using the default event loop")
+        return
+
+    uvloop.install()
+
+
 if __name__ == '__main__':
+    if settings.USE_UVLOOP:
+        install_uvloop()
+
     with suppress(KeyboardInterrupt):
         asyncio.run(main())